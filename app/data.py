@@ -10,11 +10,17 @@ from typing import Dict, List, Optional, Tuple
 
 from uuid import uuid4
 
+import numpy as np
+import pandas as pd
+
 from app import model as ai_model
 
 DATASET_ROOT = Path(__file__).resolve().parent / "dataset"
 PREDICTIONS_FILE = Path(__file__).resolve().parent / "predictions.csv"
 
+# Try multiple encodings (Excel/Windows KR data often comes as cp949/euc-kr)
+CSV_ENCODINGS: Tuple[str, ...] = ("utf-8-sig", "utf-8", "cp949", "euc-kr")
+
 
 def _load_predictions_from_csv() -> List[dict]:
     if not PREDICTIONS_FILE.exists():
@@ -77,25 +83,90 @@ def _dataset_directory(dataset_id: str) -> Path:
     return DATASET_ROOT / dataset_id
 
 
+def _load_dataset_meta(dataset_dir: Path) -> Optional[dict]:
+    meta_path = dataset_dir / "dataset_meta.json"
+    if not meta_path.exists():
+        return None
+    with meta_path.open(encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def _csv_encodings(dataset_dir: Path, kind: str) -> Tuple[str, ...]:
+    """Return encodings to try, starting with the one detected at ingestion."""
+
+    meta = _load_dataset_meta(dataset_dir) or {}
+    detected = meta.get("encoding", {}).get(kind)
+    if detected in CSV_ENCODINGS:
+        return (detected,) + tuple(enc for enc in CSV_ENCODINGS if enc != detected)
+    return CSV_ENCODINGS
+
+
+# Source CSV and binary artifact written next to it at ingestion, per file kind.
+DATASET_FILES: Dict[str, Tuple[str, str]] = {
+    "phenotype": ("phenotype/phenotype.csv", "phenotype/phenotype.pkl"),
+    "genotype": ("strains/strains.csv", "strains/genotype.npz"),
+}
+
+
+def _source_signature(path: Path) -> dict:
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _fresh_artifact(dataset_dir: Path, kind: str) -> Optional[Path]:
+    """Return the binary artifact for ``kind`` if its source CSV is unchanged.
+
+    Hand-edited CSVs no longer match the size/mtime recorded at ingestion, in
+    which case callers fall back to parsing the CSV itself.
+    """
+
+    csv_name, artifact_name = DATASET_FILES[kind]
+    source = dataset_dir / csv_name
+    artifact = dataset_dir / artifact_name
+    if not artifact.exists() or not source.exists():
+        return None
+
+    meta = _load_dataset_meta(dataset_dir) or {}
+    recorded = meta.get("sources", {}).get(kind)
+    if recorded != _source_signature(source):
+        return None
+    return artifact
+
+
 def _load_strain_metadata(dataset_dir: Path) -> Tuple[List[str], dict]:
+    genotype_npz = _fresh_artifact(dataset_dir, "genotype")
+    if genotype_npz is not None:
+        with np.load(genotype_npz, allow_pickle=False) as archive:
+            strain_ids = archive["strain_ids"].tolist()
+            chr_values = archive["chr"].tolist()
+            bp_values = archive["bp"].tolist()
+        return strain_ids, {"chr": chr_values, "bp": bp_values, "numberOfSNP": len(bp_values)}
+
     strains_csv = dataset_dir / "strains" / "strains.csv"
     if not strains_csv.exists():
         return [], {"chr": [], "bp": [], "numberOfSNP": 0}
 
-    with strains_csv.open(newline="", encoding="utf-8") as handle:
-        reader = csv.reader(handle)
-        header = next(reader, [])
-        strain_ids = header[3:] if len(header) > 3 else []
+    for enc in _csv_encodings(dataset_dir, "genotype"):
+        try:
+            with strains_csv.open(newline="", encoding=enc) as handle:
+                reader = csv.reader(handle)
+                header = next(reader, [])
+                strain_ids = header[3:] if len(header) > 3 else []
 
-        chr_values: List[str] = []
-        bp_values: List[str] = []
-        for row in reader:
-            if len(row) < 3:
-                continue
-            chr_values.append(row[1])
-            bp_values.append(row[2])
+                chr_values: List[str] = []
+                bp_values: List[str] = []
+                for row in reader:
+                    if len(row) < 3:
+                        continue
+                    chr_values.append(row[1])
+                    bp_values.append(row[2])
+        except UnicodeDecodeError:
+            continue
+        return strain_ids, {"chr": chr_values, "bp": bp_values, "numberOfSNP": len(bp_values)}
 
-    return strain_ids, {"chr": chr_values, "bp": bp_values, "numberOfSNP": len(bp_values)}
+    raise ValueError(
+        f"Cannot decode strains.csv with supported encodings: {strains_csv}"
+    )
 
 
 def _load_phenotype_columns(dataset_dir: Path) -> List[str]:
@@ -103,8 +174,7 @@ def _load_phenotype_columns(dataset_dir: Path) -> List[str]:
     if not phenotype_csv.exists():
         return []
 
-    # Try multiple encodings (Excel/Windows KR data often comes as cp949/euc-kr)
-    for enc in ("utf-8-sig", "utf-8", "cp949", "euc-kr"):
+    for enc in _csv_encodings(dataset_dir, "phenotype"):
         try:
             with phenotype_csv.open(newline="", encoding=enc) as handle:
                 reader = csv.reader(handle)
@@ -118,14 +188,56 @@ def _load_phenotype_columns(dataset_dir: Path) -> List[str]:
     )
 
 
+def _parse_phenotype_value(value: str) -> object:
+    if value == "":
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+# Loaded phenotype frames keyed by pickle path, with the mtime they were read at.
+_PHENOTYPE_FRAMES: Dict[Path, Tuple[int, pd.DataFrame]] = {}
+
+
+def _load_phenotype_frame(phenotype_pkl: Path) -> pd.DataFrame:
+    mtime_ns = phenotype_pkl.stat().st_mtime_ns
+    cached = _PHENOTYPE_FRAMES.get(phenotype_pkl)
+    if cached is None or cached[0] != mtime_ns:
+        cached = (mtime_ns, pd.read_pickle(phenotype_pkl))
+        _PHENOTYPE_FRAMES[phenotype_pkl] = cached
+    return cached[1]
+
+
+def _load_phenotype_values_from_pickle(phenotype_pkl: Path, strain_id: str) -> Optional[dict]:
+    """Look up a strain in the pre-parsed phenotype frame written at ingestion."""
+
+    frame = _load_phenotype_frame(phenotype_pkl)
+    if strain_id not in frame.index:
+        return None
+
+    phenotype: Dict[str, object] = {}
+    for key, value in frame.loc[strain_id].items():
+        # Cells are raw strings; NaN only marks fields missing from a short row.
+        if not isinstance(value, str):
+            continue
+        phenotype[key] = _parse_phenotype_value(value)
+    return phenotype
+
+
 def _load_phenotype_values(dataset_dir: Path, strain_id: str) -> Optional[dict]:
-    """Load phenotype values for a strain from the dataset CSV."""
+    """Load phenotype values for a strain from the ingested frame or the CSV."""
+
+    phenotype_pkl = _fresh_artifact(dataset_dir, "phenotype")
+    if phenotype_pkl is not None:
+        return _load_phenotype_values_from_pickle(phenotype_pkl, strain_id)
 
     phenotype_csv = dataset_dir / "phenotype" / "phenotype.csv"
     if not phenotype_csv.exists():
         return None
 
-    encodings = ("utf-8-sig", "utf-8", "cp949", "euc-kr")
+    encodings = _csv_encodings(dataset_dir, "phenotype")
     last_error: Optional[Exception] = None
     for enc in encodings:
         try:
@@ -140,13 +252,7 @@ def _load_phenotype_values(dataset_dir: Path, strain_id: str) -> Optional[dict]:
 
                     phenotype: Dict[str, object] = {}
                     for key, value in zip(header[1:], row[1:]):
-                        if value == "":
-                            phenotype[key] = None
-                            continue
-                        try:
-                            phenotype[key] = float(value)
-                        except ValueError:
-                            phenotype[key] = value
+                        phenotype[key] = _parse_phenotype_value(value)
                     return phenotype
                 return None
         except UnicodeDecodeError as exc:
@@ -181,7 +287,12 @@ def list_datasets() -> List[str]:
     if not DATASET_ROOT.exists():
         return []
 
-    return sorted(item.name for item in DATASET_ROOT.iterdir() if item.is_dir())
+    # Hidden directories are ingestion staging areas that are not yet published.
+    return sorted(
+        item.name
+        for item in DATASET_ROOT.iterdir()
+        if item.is_dir() and not item.name.startswith(".")
+    )
 
 
 def get_dataset(dataset_id: str) -> Optional[dict]:
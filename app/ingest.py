@@ -0,0 +1,314 @@
+"""Streaming ingestion of uploaded phenotype/genotype files into dataset folders."""
+
+from __future__ import annotations
+
+import codecs
+import csv
+import json
+import os
+import re
+import shutil
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, List, Tuple
+
+from uuid import uuid4
+
+import numpy as np
+import pandas as pd
+
+from app import data
+
+# Bytes read from an upload stream at a time.
+CHUNK_SIZE = 1 << 20
+# Rows handed to pandas per parsing chunk.
+ROW_CHUNK_SIZE = 10_000
+
+_DATASET_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
+_GENOTYPE_META_COLUMNS = 3
+# Genotype cells treated as missing calls rather than invalid values.
+_GENOTYPE_MISSING_VALUES = ("", "NA", "NaN", "nan", ".", "-")
+
+
+def _stage_upload(stream: BinaryIO, destination: Path) -> Tuple[str, int]:
+    """Copy an upload to ``destination`` chunk by chunk.
+
+    Every supported encoding starts as a candidate and is dropped as soon as a
+    chunk fails to decode with it, so a cp949 file whose first chunk happens to
+    be plain ASCII is still accepted. Returns the first surviving encoding and
+    an upper bound on the number of lines, used to preallocate parse buffers.
+    """
+
+    candidates = [
+        (enc, codecs.getincrementaldecoder(enc)()) for enc in data.CSV_ENCODINGS
+    ]
+    line_count = 0
+    last_byte = b""
+    with destination.open("wb") as handle:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            candidates = _decodable(candidates, chunk, final=False)
+            if not candidates:
+                raise ValueError(f"{destination.name} 파일의 인코딩을 지원하지 않습니다.")
+            line_count += max(chunk.count(b"\n"), chunk.count(b"\r"))
+            last_byte = chunk[-1:]
+            handle.write(chunk)
+
+    if not last_byte:
+        raise ValueError(f"{destination.name} 파일이 비어 있습니다.")
+    candidates = _decodable(candidates, b"", final=True)
+    if not candidates:
+        raise ValueError(f"{destination.name} 파일의 인코딩을 지원하지 않습니다.")
+    if last_byte not in (b"\n", b"\r"):
+        line_count += 1
+    return candidates[0][0], line_count
+
+
+def _decodable(
+    candidates: List[Tuple[str, codecs.IncrementalDecoder]], chunk: bytes, final: bool
+) -> List[Tuple[str, codecs.IncrementalDecoder]]:
+    surviving = []
+    for enc, decoder in candidates:
+        try:
+            decoder.decode(chunk, final=final)
+        except UnicodeDecodeError:
+            continue
+        surviving.append((enc, decoder))
+    return surviving
+
+
+def _read_header(path: Path, encoding: str) -> List[str]:
+    with path.open(newline="", encoding=encoding) as handle:
+        return next(csv.reader(handle), [])
+
+
+def _find_duplicates(values: Iterable[str]) -> List[str]:
+    seen = set()
+    duplicates = set()
+    for value in values:
+        if value in seen:
+            duplicates.add(value)
+        seen.add(value)
+    return sorted(duplicates)
+
+
+def _iter_chunks(path: Path, encoding: str, header: List[str]) -> Iterator[pd.DataFrame]:
+    """Yield raw string chunks of a CSV, keeping cells exactly as written.
+
+    Rows are split with :mod:`csv` rather than pandas, which silently shifts or
+    truncates rows whose field count differs from the header; such rows are
+    rejected here instead. Blank lines are skipped.
+    """
+
+    with path.open(newline="", encoding=encoding) as handle:
+        reader = csv.reader(handle)
+        next(reader, None)
+        rows: List[List[str]] = []
+        for row in reader:
+            if not row:
+                continue
+            if len(row) != len(header):
+                raise ValueError(
+                    f"{path.name} {reader.line_num}번째 줄의 열 개수({len(row)})가 "
+                    f"헤더({len(header)})와 다릅니다."
+                )
+            rows.append(row)
+            if len(rows) == ROW_CHUNK_SIZE:
+                yield pd.DataFrame(rows, columns=header, dtype=object)
+                rows = []
+        if rows:
+            yield pd.DataFrame(rows, columns=header, dtype=object)
+
+
+def _check_capacity(filled: int, rows: int, capacity: int, name: str) -> None:
+    if filled + rows > capacity:
+        raise ValueError(f"{name} 파일의 줄바꿈 형식을 인식할 수 없습니다.")
+
+
+def _parse_phenotype(path: Path, encoding: str, line_count: int) -> pd.DataFrame:
+    """Parse the staged phenotype CSV into a string frame indexed by strain id.
+
+    Cells are kept as the raw strings so lookups convert them exactly like
+    the CSV reader in :mod:`app.data`.
+    """
+
+    header = _read_header(path, encoding)
+    if len(header) < 2:
+        raise ValueError("phenotype.csv 에 계통 ID와 형질 컬럼이 필요합니다.")
+    duplicates = _find_duplicates(header)
+    if duplicates:
+        raise ValueError(f"phenotype.csv 에 중복된 컬럼이 있습니다: {', '.join(duplicates)}")
+
+    id_column = header[0]
+    capacity = max(line_count - 1, 0)
+    values = np.empty((capacity, len(header)), dtype=object)
+    filled = 0
+    for chunk in _iter_chunks(path, encoding, header):
+        chunk = chunk[chunk[id_column] != ""]
+        _check_capacity(filled, len(chunk), capacity, path.name)
+        values[filled : filled + len(chunk)] = chunk.to_numpy(dtype=object)
+        filled += len(chunk)
+
+    values = values[:filled]
+    frame = pd.DataFrame(
+        values[:, 1:],
+        index=pd.Index(values[:, 0], name=id_column),
+        columns=header[1:],
+        copy=False,
+    )
+    duplicates = _find_duplicates(frame.index)
+    if duplicates:
+        raise ValueError(f"phenotype.csv 에 중복된 계통 ID가 있습니다: {', '.join(duplicates[:10])}")
+    return frame
+
+
+def _parse_genotype(
+    path: Path, encoding: str, line_count: int, strain_ids: List[str], matrix_path: Path
+) -> Tuple[List[str], List[str], List[str], np.ndarray]:
+    """Parse the staged genotype CSV into SNP ids, chr, bp and a dosage matrix.
+
+    The matrix is written chunk by chunk into a memory-mapped ``.npy`` at
+    ``matrix_path`` sized from ``line_count``, and a view of the filled rows is
+    returned. Non-numeric calls are rejected instead of being coerced to NaN.
+    """
+
+    header = _read_header(path, encoding)
+    snp_column, chr_column, bp_column = header[:_GENOTYPE_META_COLUMNS]
+
+    capacity = max(line_count - 1, 0)
+    matrix = np.lib.format.open_memmap(
+        matrix_path, mode="w+", dtype=np.float32, shape=(max(capacity, 1), len(strain_ids))
+    )
+    observed = np.zeros(len(strain_ids), dtype=np.int64)
+    snp_ids: List[str] = []
+    chr_values: List[str] = []
+    bp_values: List[str] = []
+    filled = 0
+    for chunk in _iter_chunks(path, encoding, header):
+        _check_capacity(filled, len(chunk), capacity, path.name)
+        raw = chunk[strain_ids]
+        numeric = raw.apply(pd.to_numeric, errors="coerce")
+        invalid = numeric.isna() & ~raw.isin(_GENOTYPE_MISSING_VALUES)
+        if invalid.to_numpy().any():
+            examples = raw[invalid].stack()
+            raise ValueError(
+                f"strains.csv 에 숫자가 아닌 유전형 값이 {len(examples)}개 있습니다 "
+                f"(예: {examples.iloc[0]!r}, 계통 {examples.index[0][1]})."
+            )
+
+        matrix[filled : filled + len(chunk)] = numeric.to_numpy(dtype=np.float32)
+        observed += numeric.notna().to_numpy().sum(axis=0)
+        snp_ids.extend(chunk[snp_column].tolist())
+        chr_values.extend(chunk[chr_column].tolist())
+        bp_values.extend(chunk[bp_column].tolist())
+        filled += len(chunk)
+
+    if not filled:
+        raise ValueError("strains.csv 에 SNP 행이 없습니다.")
+    empty = [strain_id for strain_id, count in zip(strain_ids, observed) if count == 0]
+    if empty:
+        raise ValueError(f"유전형 값이 모두 비어 있는 계통이 있습니다: {', '.join(empty[:10])}")
+    matrix.flush()
+    return snp_ids, chr_values, bp_values, matrix[:filled]
+
+
+def _validate_strain_ids(phenotype_ids: List[str], genotype_ids: List[str]) -> None:
+    """Ensure both files describe exactly the same set of strains."""
+
+    if not genotype_ids:
+        raise ValueError("strains.csv 에 계통 ID 컬럼이 없습니다.")
+    duplicates = _find_duplicates(genotype_ids)
+    if duplicates:
+        raise ValueError(f"strains.csv 에 중복된 계통 ID가 있습니다: {', '.join(duplicates[:10])}")
+
+    missing_genotype = sorted(set(phenotype_ids) - set(genotype_ids))
+    missing_phenotype = sorted(set(genotype_ids) - set(phenotype_ids))
+    if missing_genotype:
+        raise ValueError(
+            f"유전형 정보가 없는 계통 ID가 있습니다: {', '.join(missing_genotype[:10])}"
+        )
+    if missing_phenotype:
+        raise ValueError(
+            f"표현형 정보가 없는 계통 ID가 있습니다: {', '.join(missing_phenotype[:10])}"
+        )
+
+
+def ingest_dataset(
+    dataset_id: str, phenotype_stream: BinaryIO, genotype_stream: BinaryIO
+) -> dict:
+    """Stream uploaded files into a new dataset folder and publish it atomically.
+
+    The raw CSVs are kept under the usual ``phenotype/`` and ``strains/`` paths,
+    next to ``phenotype.pkl`` and ``genotype.npz`` artifacts and a
+    ``dataset_meta.json`` recording the detected encodings and the size/mtime
+    of each CSV, so later hand edits are detected as stale artifacts.
+    """
+
+    if not _DATASET_ID_PATTERN.match(dataset_id):
+        raise ValueError("데이터세트 ID는 영문, 숫자, '_', '-' 만 사용할 수 있습니다.")
+
+    dataset_dir = data.DATASET_ROOT / dataset_id
+    if dataset_dir.exists():
+        raise ValueError("이미 존재하는 데이터세트입니다.")
+
+    data.DATASET_ROOT.mkdir(parents=True, exist_ok=True)
+    staging_dir = data.DATASET_ROOT / f".{dataset_id}.{uuid4().hex[:8]}.tmp"
+    phenotype_dir = staging_dir / "phenotype"
+    strains_dir = staging_dir / "strains"
+    try:
+        phenotype_dir.mkdir(parents=True)
+        strains_dir.mkdir(parents=True)
+
+        phenotype_csv = phenotype_dir / "phenotype.csv"
+        strains_csv = strains_dir / "strains.csv"
+        phenotype_encoding, phenotype_lines = _stage_upload(phenotype_stream, phenotype_csv)
+        genotype_encoding, genotype_lines = _stage_upload(genotype_stream, strains_csv)
+
+        phenotype = _parse_phenotype(phenotype_csv, phenotype_encoding, phenotype_lines)
+        genotype_header = _read_header(strains_csv, genotype_encoding)
+        strain_ids = genotype_header[_GENOTYPE_META_COLUMNS:]
+        _validate_strain_ids(list(phenotype.index), strain_ids)
+
+        matrix_path = staging_dir / "genotype_matrix.npy"
+        snp_ids, chr_values, bp_values, matrix = _parse_genotype(
+            strains_csv, genotype_encoding, genotype_lines, strain_ids, matrix_path
+        )
+        phenotype.to_pickle(phenotype_dir / "phenotype.pkl")
+        # np.savez streams the memory-mapped matrix into the archive in chunks.
+        np.savez(
+            strains_dir / "genotype.npz",
+            strain_ids=np.array(strain_ids, dtype=str),
+            snp_ids=np.array(snp_ids, dtype=str),
+            chr=np.array(chr_values, dtype=str),
+            bp=np.array(bp_values, dtype=str),
+            matrix=matrix,
+        )
+        number_of_snp = int(matrix.shape[0])
+        del matrix
+        matrix_path.unlink()
+
+        meta = {
+            "id": dataset_id,
+            "encoding": {"phenotype": phenotype_encoding, "genotype": genotype_encoding},
+            "sources": {
+                "phenotype": data._source_signature(phenotype_csv),
+                "genotype": data._source_signature(strains_csv),
+            },
+            "strains": strain_ids,
+            "phenotype": [str(column) for column in phenotype.columns],
+            "numberOfSNP": number_of_snp,
+            "createdAt": data._iso_now(),
+        }
+        with (staging_dir / "dataset_meta.json").open("w", encoding="utf-8") as handle:
+            json.dump(meta, handle, ensure_ascii=False, indent=2)
+
+        try:
+            os.rename(staging_dir, dataset_dir)
+        except OSError as exc:
+            raise ValueError("이미 존재하는 데이터세트입니다.") from exc
+    except BaseException:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+
+    return meta
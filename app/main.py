@@ -2,10 +2,10 @@ from __future__ import annotations
 
 from typing import Dict, Optional
 
-from fastapi import Body, FastAPI, Query
+from fastapi import Body, FastAPI, File, Query, UploadFile
 from fastapi.responses import JSONResponse
 
-from app import data, model
+from app import data, ingest, model
 
 app = FastAPI(
     title="BRAI API Prototype",
@@ -48,6 +48,21 @@ def get_dataset(dataset_id: str) -> JSONResponse:
     return JSONResponse(content={"success": True, "data": [dataset]})
 
 
+@app.post("/api/dataset/{dataset_id}/upload")
+def upload_dataset(
+    dataset_id: str,
+    phenotype: UploadFile = File(...),
+    genotype: UploadFile = File(...),
+) -> JSONResponse:
+    try:
+        ingest.ingest_dataset(dataset_id, phenotype.file, genotype.file)
+    except ValueError as exc:
+        return _bad_request(str(exc))
+
+    dataset = data.get_dataset(dataset_id)
+    return JSONResponse(status_code=201, content={"success": True, "data": [dataset]})
+
+
 @app.get("/api/strains/{strain_id}")
 @app.post("/api/strains/{strain_id}")
 def get_strain(strain_id: str) -> JSONResponse:
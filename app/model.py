@@ -41,8 +41,11 @@ def list_models() -> List[str]:
     if not MODEL_ROOT.exists():
         return []
 
+    # Hidden directories are training staging areas that are not yet published.
     model_ids = [
-        path.name for path in MODEL_ROOT.iterdir() if (path / "description.json").exists()
+        path.name
+        for path in MODEL_ROOT.iterdir()
+        if not path.name.startswith(".") and (path / "description.json").exists()
     ]
     return sorted(model_ids)
 
@@ -93,7 +96,9 @@ class ModelPredictor:
         traits = meta.get("traits", [])
         n_pc = int(meta.get("n_pc", 0))
 
-        pc_df = pd.read_csv(model_dir / "line_pcs.csv").set_index("line_id")
+        pc_df = pd.read_csv(
+            model_dir / "line_pcs.csv", dtype={"line_id": str}
+        ).set_index("line_id")
 
         rf_models: Dict[str, object] = {}
         for trait in traits:
@@ -0,0 +1,493 @@
+"""Local training pipeline that writes versioned model directories.
+
+Run ``python -m app.train <dataset_id>`` to build a genotype PCA, derive cross
+features with the same formula as :func:`app.model._make_cross_feature_from_pc`
+and fit one random forest per trait. The dataset needs ``strains/strains.csv``
+genotypes, e.g. uploaded through ``/api/dataset/{id}/upload``. Each run writes
+``<name>_v<N>`` under ``app/model`` so the new model shows up in
+``list_models``/``get_model`` without a restart.
+
+A trait is trained on observed hybrid values from ``crosses/crosses.csv``
+(``maleStrainId,femaleStrainId,<trait>...``) when the dataset has any for it,
+and otherwise on the mid-parent value of every pair of lines.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from uuid import uuid4
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.decomposition import PCA
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+
+from app import data, ingest
+from app import model as ai_model
+
+DEFAULT_N_PC = 10
+DEFAULT_N_ESTIMATORS = 500
+DEFAULT_RANDOM_STATE = 42
+# Upper bound on training pairs per trait; larger line sets are sampled.
+DEFAULT_MAX_PAIRS = 200_000
+
+CROSSES_FILE = Path("crosses") / "crosses.csv"
+_CROSS_PARENT_COLUMNS = ["maleStrainId", "femaleStrainId"]
+TARGET_OBSERVED = "observed"
+TARGET_MID_PARENT = "midParent"
+
+
+def _read_csv_frame(dataset_dir: Path, kind: str, path: Path) -> pd.DataFrame:
+    """Read a dataset CSV as raw strings, trying each supported encoding."""
+
+    for enc in data._csv_encodings(dataset_dir, kind):
+        try:
+            header = ingest._read_header(path, enc)
+            chunks = list(ingest._iter_chunks(path, enc, header))
+        except UnicodeDecodeError:
+            continue
+        if not chunks:
+            return pd.DataFrame(columns=header, dtype=object)
+        return pd.concat(chunks, ignore_index=True)
+
+    raise ValueError(f"Cannot decode {path.name} with supported encodings: {path}")
+
+
+def _load_genotype(dataset_dir: Path) -> Tuple[List[str], np.ndarray]:
+    """Return strain ids and a strain x SNP dosage matrix for the dataset."""
+
+    genotype_npz = data._fresh_artifact(dataset_dir, "genotype")
+    if genotype_npz is not None:
+        with np.load(genotype_npz, allow_pickle=False) as archive:
+            return archive["strain_ids"].tolist(), archive["matrix"].T
+
+    strains_csv = dataset_dir / "strains" / "strains.csv"
+    if not strains_csv.exists():
+        raise ValueError("유전형 데이터(strains.csv)가 존재하지 않습니다.")
+
+    frame = _read_csv_frame(dataset_dir, "genotype", strains_csv)
+    strain_ids = [str(column) for column in frame.columns[3:]]
+    if frame.empty or not strain_ids:
+        raise ValueError("유전형 데이터(strains.csv)에 SNP 또는 계통이 없습니다.")
+    values = frame[strain_ids].apply(pd.to_numeric, errors="coerce")
+    return strain_ids, values.to_numpy(dtype=np.float32).T
+
+
+def _load_phenotype(dataset_dir: Path) -> pd.DataFrame:
+    """Return the numeric phenotype columns indexed by strain id."""
+
+    phenotype_pkl = data._fresh_artifact(dataset_dir, "phenotype")
+    phenotype_csv = dataset_dir / "phenotype" / "phenotype.csv"
+    if phenotype_pkl is not None:
+        frame = pd.read_pickle(phenotype_pkl)
+    elif phenotype_csv.exists():
+        frame = _read_csv_frame(dataset_dir, "phenotype", phenotype_csv)
+        frame = frame.set_index(frame.columns[0])
+    else:
+        raise ValueError("표현형 데이터(phenotype.csv)가 존재하지 않습니다.")
+
+    frame.index = frame.index.astype(str)
+    numeric = frame.apply(pd.to_numeric, errors="coerce")
+    return numeric.loc[:, numeric.notna().any()]
+
+
+def _load_crosses(dataset_dir: Path) -> Optional[pd.DataFrame]:
+    """Return observed cross phenotypes, or ``None`` if the dataset has none."""
+
+    crosses_csv = dataset_dir / CROSSES_FILE
+    if not crosses_csv.exists():
+        return None
+
+    frame = _read_csv_frame(dataset_dir, "crosses", crosses_csv)
+    missing = [column for column in _CROSS_PARENT_COLUMNS if column not in frame.columns]
+    if missing:
+        raise ValueError(f"crosses.csv 에 필요한 컬럼이 없습니다: {', '.join(missing)}")
+
+    traits = [column for column in frame.columns if column not in _CROSS_PARENT_COLUMNS]
+    frame[traits] = frame[traits].apply(pd.to_numeric, errors="coerce")
+    return frame
+
+
+def _observed_crosses(crosses: Optional[pd.DataFrame], trait: str) -> Optional[pd.DataFrame]:
+    if crosses is None or trait not in crosses.columns:
+        return None
+    observed = crosses.loc[crosses[trait].notna(), _CROSS_PARENT_COLUMNS + [trait]]
+    return observed if not observed.empty else None
+
+
+def _hash_genotype(strain_ids: List[str], matrix: np.ndarray) -> str:
+    digest = hashlib.sha256()
+    digest.update(json.dumps(strain_ids).encode("utf-8"))
+    digest.update(np.ascontiguousarray(matrix, dtype=np.float32).tobytes())
+    return digest.hexdigest()
+
+
+def _hash_trait(column: pd.Series, observed: Optional[pd.DataFrame]) -> str:
+    digest = hashlib.sha256(column.sort_index().to_json().encode("utf-8"))
+    if observed is not None:
+        digest.update(observed.to_json(orient="values").encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _fit_pca(
+    strain_ids: List[str], matrix: np.ndarray, n_pc: int, random_state: int
+) -> Tuple[Pipeline, pd.DataFrame]:
+    """Fit the genotype PCA pipeline and return it with the per-line PCs."""
+
+    n_pc = min(n_pc, matrix.shape[0], matrix.shape[1])
+    pipeline = Pipeline(
+        [
+            ("impute", SimpleImputer(strategy="mean")),
+            ("pca", PCA(n_components=n_pc, random_state=random_state)),
+        ]
+    )
+    pcs = pipeline.fit_transform(matrix)
+    pc_df = pd.DataFrame(
+        pcs,
+        index=pd.Index(strain_ids, name="line_id"),
+        columns=[f"PC{i + 1}" for i in range(n_pc)],
+    )
+    return pipeline, pc_df
+
+
+def _make_training_pairs(
+    n_lines: int, max_pairs: Optional[int], random_state: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return row indices of the parents of each training pair.
+
+    Cross features are symmetric in the parents, so unordered pairs (including
+    selfs) suffice. When there are more than ``max_pairs`` a reproducible
+    random subset is used.
+    """
+
+    left, right = np.triu_indices(n_lines)
+    if max_pairs is not None and len(left) > max_pairs:
+        rng = np.random.default_rng(random_state)
+        keep = np.sort(rng.choice(len(left), size=max_pairs, replace=False))
+        left, right = left[keep], right[keep]
+    return left, right
+
+
+def _make_cross_features(pcs: np.ndarray, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Vectorised :func:`app.model._make_cross_feature_from_pc` over many pairs."""
+
+    m_pcs = pcs[left]
+    f_pcs = pcs[right]
+    return np.hstack([(m_pcs + f_pcs) / 2.0, np.abs(m_pcs - f_pcs)]).astype(np.float32)
+
+
+def _make_cross_targets(values: np.ndarray, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Mid-parent value of the trait for every training pair."""
+
+    return (values[left] + values[right]) / 2.0
+
+
+def _make_training_set(
+    column: pd.Series,
+    observed: Optional[pd.DataFrame],
+    pc_df: pd.DataFrame,
+    max_pairs: Optional[int],
+    random_state: int,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return ``pc_df`` row indices of both parents and the target per pair."""
+
+    if observed is not None:
+        known = observed[
+            observed["maleStrainId"].isin(pc_df.index)
+            & observed["femaleStrainId"].isin(pc_df.index)
+        ]
+        left = pc_df.index.get_indexer(known["maleStrainId"])
+        right = pc_df.index.get_indexer(known["femaleStrainId"])
+        return left, right, known.iloc[:, -1].to_numpy(dtype=np.float64)
+
+    column = column[column.index.isin(pc_df.index)]
+    rows = pc_df.index.get_indexer(column.index)
+    left, right = _make_training_pairs(len(rows), max_pairs, random_state)
+    targets = _make_cross_targets(column.to_numpy(dtype=np.float64), left, right)
+    return rows[left], rows[right], targets
+
+
+def _fit_trait(
+    trait: str,
+    features_path: Path,
+    targets: np.ndarray,
+    output_path: Path,
+    n_estimators: int,
+    random_state: int,
+    n_jobs: int,
+) -> Tuple[str, float]:
+    """Fit and persist a single trait forest. Runs inside a worker process."""
+
+    started = time.perf_counter()
+    features = np.load(features_path, mmap_mode="r")
+    forest = RandomForestRegressor(
+        n_estimators=n_estimators, random_state=random_state, n_jobs=n_jobs
+    )
+    forest.fit(features, targets)
+    joblib.dump(forest, output_path)
+    return trait, time.perf_counter() - started
+
+
+def _next_model_id(name: str) -> str:
+    pattern = re.compile(rf"^{re.escape(name)}_v(\d+)$")
+    versions = [
+        int(match.group(1))
+        for model_id in ai_model.list_models()
+        if (match := pattern.match(model_id))
+    ]
+    return f"{name}_v{max(versions, default=0) + 1}"
+
+
+def _latest_model_meta(name: str) -> Optional[Tuple[Path, dict]]:
+    pattern = re.compile(rf"^{re.escape(name)}_v(\d+)$")
+    candidates = [
+        (int(match.group(1)), model_id)
+        for model_id in ai_model.list_models()
+        if (match := pattern.match(model_id))
+    ]
+    if not candidates:
+        return None
+
+    _, model_id = max(candidates)
+    model_dir = ai_model._model_directory(model_id)
+    meta = ai_model._load_meta(model_dir)
+    if meta is None:
+        return None
+    return model_dir, meta
+
+
+def train_model(
+    dataset_id: str,
+    name: Optional[str] = None,
+    n_pc: int = DEFAULT_N_PC,
+    n_estimators: int = DEFAULT_N_ESTIMATORS,
+    random_state: int = DEFAULT_RANDOM_STATE,
+    max_workers: Optional[int] = None,
+    max_pairs: Optional[int] = DEFAULT_MAX_PAIRS,
+    incremental: bool = True,
+) -> dict:
+    """Train a new model version from a dataset and return its summary.
+
+    With ``incremental`` enabled, the PCA and any trait forest whose phenotype
+    column and training parameters are unchanged since the previous version
+    of ``name`` are copied instead of being refit.
+    """
+
+    timings: Dict[str, float] = {}
+    name = name or f"{dataset_id}_rf"
+
+    started = time.perf_counter()
+    dataset_dir = data._dataset_directory(dataset_id)
+    if not dataset_dir.is_dir():
+        raise ValueError(f"Dataset '{dataset_id}' not found")
+    strain_ids, matrix = _load_genotype(dataset_dir)
+    phenotype = _load_phenotype(dataset_dir)
+    if phenotype.columns.empty:
+        raise ValueError("학습에 사용할 수치형 형질이 없습니다.")
+    crosses = _load_crosses(dataset_dir)
+    timings["load"] = time.perf_counter() - started
+
+    params = {
+        "n_pc": n_pc,
+        "n_estimators": n_estimators,
+        "random_state": random_state,
+        "max_pairs": max_pairs,
+    }
+    genotype_hash = _hash_genotype(strain_ids, matrix)
+    previous = _latest_model_meta(name) if incremental else None
+    if previous is not None and (
+        previous[1].get("dataset") != dataset_id
+        or previous[1].get("params") != params
+        or previous[1].get("genotypeHash") != genotype_hash
+    ):
+        previous = None
+    previous_dir, previous_meta = previous if previous is not None else (None, {})
+
+    model_id = _next_model_id(name)
+    model_dir = ai_model._model_directory(model_id)
+    staging_dir = ai_model.MODEL_ROOT / f".{model_id}.{uuid4().hex[:8]}.tmp"
+    staging_dir.mkdir(parents=True)
+    try:
+        started = time.perf_counter()
+        if previous_dir is not None:
+            shutil.copy2(previous_dir / "geno_pca_pipeline.joblib", staging_dir)
+            shutil.copy2(previous_dir / "line_pcs.csv", staging_dir)
+            pc_df = pd.read_csv(
+                staging_dir / "line_pcs.csv", dtype={"line_id": str}
+            ).set_index("line_id")
+        else:
+            pipeline, pc_df = _fit_pca(strain_ids, matrix, n_pc, random_state)
+            joblib.dump(pipeline, staging_dir / "geno_pca_pipeline.joblib")
+            pc_df.to_csv(staging_dir / "line_pcs.csv")
+        effective_n_pc = pc_df.shape[1]
+        timings["pca"] = time.perf_counter() - started
+
+        observed = {trait: _observed_crosses(crosses, trait) for trait in phenotype.columns}
+        targets_by_trait = {
+            trait: TARGET_MID_PARENT if observed[trait] is None else TARGET_OBSERVED
+            for trait in phenotype.columns
+        }
+        trait_hashes = {
+            trait: _hash_trait(phenotype[trait].dropna(), observed[trait])
+            for trait in phenotype.columns
+        }
+        previous_hashes = previous_meta.get("traitHashes", {})
+        reused = [
+            trait
+            for trait, digest in trait_hashes.items()
+            if previous_dir is not None
+            and previous_hashes.get(trait) == digest
+            and (previous_dir / f"rf_{trait}.joblib").exists()
+        ]
+        for trait in reused:
+            shutil.copy2(previous_dir / f"rf_{trait}.joblib", staging_dir)
+        to_train = [trait for trait in phenotype.columns if trait not in reused]
+
+        # Features depend only on which parent pairs are used, so they are
+        # built once per distinct pair set and shared with workers as .npy files.
+        started = time.perf_counter()
+        features_dir = staging_dir / ".features"
+        features_dir.mkdir()
+        pcs = pc_df.to_numpy(dtype=np.float64)[:, :effective_n_pc]
+        feature_sets: Dict[Tuple[bytes, bytes], Path] = {}
+        jobs = []
+        for trait in to_train:
+            left, right, targets = _make_training_set(
+                phenotype[trait].dropna(), observed[trait], pc_df, max_pairs, random_state
+            )
+            if len(targets) == 0:
+                raise ValueError(f"{trait} 학습에 사용할 계통이 없습니다.")
+            key = (left.tobytes(), right.tobytes())
+            if key not in feature_sets:
+                features_path = features_dir / f"features_{len(feature_sets)}.npy"
+                np.save(features_path, _make_cross_features(pcs, left, right))
+                feature_sets[key] = features_path
+            jobs.append((trait, feature_sets[key], targets, staging_dir / f"rf_{trait}.joblib"))
+        timings["features"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        trait_timings: Dict[str, float] = {}
+        if jobs:
+            cpu_count = os.cpu_count() or 1
+            workers = max(1, min(max_workers or cpu_count, len(jobs)))
+            n_jobs = max(1, cpu_count // workers)
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(
+                        _fit_trait,
+                        trait,
+                        features_path,
+                        targets,
+                        output_path,
+                        n_estimators,
+                        random_state,
+                        n_jobs,
+                    )
+                    for trait, features_path, targets, output_path in jobs
+                ]
+                try:
+                    for future in as_completed(futures):
+                        trait, seconds = future.result()
+                        trait_timings[trait] = round(seconds, 3)
+                except BaseException:
+                    # Do not start queued traits once one has failed.
+                    executor.shutdown(cancel_futures=True)
+                    raise
+            trait_timings = {trait: trait_timings[trait] for trait in to_train}
+        shutil.rmtree(features_dir)
+        timings["train"] = time.perf_counter() - started
+
+        traits = [str(trait) for trait in phenotype.columns]
+        timings = {stage: round(seconds, 3) for stage, seconds in timings.items()}
+        description = {
+            "id": model_id,
+            "name": model_id,
+            "modelType": "combiationAbility",
+            "modelDetail": "randomforest",
+            "trainedBy": dataset_id,
+        }
+        meta = {
+            "traits": traits,
+            "n_pc": effective_n_pc,
+            "line_ids": [str(line_id) for line_id in pc_df.index],
+            "dataset": dataset_id,
+            "params": params,
+            "genotypeHash": genotype_hash,
+            "targets": targets_by_trait,
+            "traitHashes": trait_hashes,
+            "retrainedTraits": to_train,
+            "reusedTraits": reused,
+            "timings": {**timings, "traits": trait_timings},
+            "createdAt": data._iso_now(),
+        }
+        with (staging_dir / "description.json").open("w", encoding="utf-8") as handle:
+            json.dump(description, handle, ensure_ascii=False, indent=4)
+        with (staging_dir / "model_meta.json").open("w", encoding="utf-8") as handle:
+            json.dump(meta, handle, ensure_ascii=False, indent=2)
+
+        os.rename(staging_dir, model_dir)
+    except BaseException:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+
+    return {"id": model_id, **meta}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Train a BRAI cross prediction model.")
+    parser.add_argument("dataset", help="dataset id under app/dataset")
+    parser.add_argument("--name", help="model name prefix (default: <dataset>_rf)")
+    parser.add_argument("--n-pc", type=int, default=DEFAULT_N_PC)
+    parser.add_argument("--n-estimators", type=int, default=DEFAULT_N_ESTIMATORS)
+    parser.add_argument("--random-state", type=int, default=DEFAULT_RANDOM_STATE)
+    parser.add_argument("--max-workers", type=int, help="trait processes to run at once")
+    parser.add_argument(
+        "--max-pairs",
+        type=int,
+        default=DEFAULT_MAX_PAIRS,
+        help="sample at most this many training pairs per trait (0 for all)",
+    )
+    parser.add_argument(
+        "--full", action="store_true", help="retrain every trait even if unchanged"
+    )
+    args = parser.parse_args(argv)
+
+    summary = train_model(
+        args.dataset,
+        name=args.name,
+        n_pc=args.n_pc,
+        n_estimators=args.n_estimators,
+        random_state=args.random_state,
+        max_workers=args.max_workers,
+        max_pairs=args.max_pairs or None,
+        incremental=not args.full,
+    )
+    print(
+        json.dumps(
+            {
+                "id": summary["id"],
+                "retrainedTraits": summary["retrainedTraits"],
+                "reusedTraits": summary["reusedTraits"],
+                "timings": summary["timings"],
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
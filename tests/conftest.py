@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+import pytest
+
+from app import data, model
+
+
+@pytest.fixture
+def dataset_root(tmp_path, monkeypatch):
+    root = tmp_path / "dataset"
+    root.mkdir()
+    monkeypatch.setattr(data, "DATASET_ROOT", root)
+    return root
+
+
+@pytest.fixture
+def model_root(tmp_path, monkeypatch):
+    root = tmp_path / "model"
+    root.mkdir()
+    monkeypatch.setattr(model, "MODEL_ROOT", root)
+    monkeypatch.setattr(model, "_PREDICTORS", {})
+    return root
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import io
+import os
+
+import pytest
+
+from app import data, ingest
+
+STRAINS = ["001", "002", "003", "004"]
+
+PHENOTYPE_CSV = (
+    "Genotype,weight,skinThickness,shape,flag\n"
+    "001,42.26,3,둥글다,TRUE\n"
+    "002,55.22,NA,약간길다,FALSE\n"
+    "003,12.22,,둥글다,1\n"
+    "004,31.42,5,길다,0\n"
+)
+
+GENOTYPE_CSV = (
+    "snp,chr,bp,001,002,003,004\n"
+    "s1,1,20288,0,1,2,0\n"
+    "s2,1,62862,2,NA,0,1\n"
+    "s3,2,65279,1,1,0,2\n"
+)
+
+
+def _ingest(dataset_id="TC2", phenotype=PHENOTYPE_CSV, genotype=GENOTYPE_CSV, encoding="utf-8"):
+    return ingest.ingest_dataset(
+        dataset_id,
+        io.BytesIO(phenotype.encode(encoding)),
+        io.BytesIO(genotype.encode(encoding)),
+    )
+
+
+def test_ingest_publishes_dataset(dataset_root):
+    meta = _ingest()
+
+    assert data.list_datasets() == ["TC2"]
+    dataset = data.get_dataset("TC2")
+    assert dataset["strains"] == STRAINS
+    assert dataset["phenotype"] == ["weight", "skinThickness", "shape", "flag"]
+    assert dataset["snpInfo"] == {
+        "chr": ["1", "1", "2"],
+        "bp": ["20288", "62862", "65279"],
+        "numberOfSNP": 3,
+    }
+    assert meta["numberOfSNP"] == 3
+    assert (dataset_root / "TC2" / "phenotype" / "phenotype.pkl").exists()
+    assert (dataset_root / "TC2" / "strains" / "genotype.npz").exists()
+
+
+def test_pickle_and_csv_payloads_match(dataset_root):
+    _ingest()
+    dataset_dir = dataset_root / "TC2"
+
+    from_pickle = {strain: data._load_phenotype_values(dataset_dir, strain) for strain in STRAINS}
+    (dataset_dir / "phenotype" / "phenotype.pkl").unlink()
+    from_csv = {strain: data._load_phenotype_values(dataset_dir, strain) for strain in STRAINS}
+
+    assert from_pickle == from_csv
+    assert from_pickle["002"] == {
+        "weight": 55.22,
+        "skinThickness": "NA",
+        "shape": "약간길다",
+        "flag": "FALSE",
+    }
+    assert from_pickle["003"]["skinThickness"] is None
+    assert from_pickle["003"]["flag"] == 1.0
+
+
+def test_encoding_survives_ascii_first_chunk(dataset_root, monkeypatch):
+    monkeypatch.setattr(ingest, "CHUNK_SIZE", 16)
+    meta = _ingest(encoding="cp949")
+
+    assert meta["encoding"]["phenotype"] == "cp949"
+    assert data.get_strain("001")["phenotype"]["shape"] == "둥글다"
+
+
+def test_hand_edited_csv_is_not_shadowed_by_artifacts(dataset_root):
+    _ingest()
+    dataset_dir = dataset_root / "TC2"
+    strains_csv = dataset_dir / "strains" / "strains.csv"
+    phenotype_csv = dataset_dir / "phenotype" / "phenotype.csv"
+
+    strains_csv.write_bytes(
+        "snp,chr,bp,001,002,003,004\ns1,염색체1,20288,0,1,2,0\n".encode("cp949")
+    )
+    phenotype_csv.write_text(PHENOTYPE_CSV.replace("42.26", "99.5"), encoding="utf-8")
+    os.utime(phenotype_csv, ns=(0, 0))
+
+    dataset = data.get_dataset("TC2")
+    assert dataset["snpInfo"]["chr"] == ["염색체1"]
+    assert data._load_phenotype_values(dataset_dir, "001")["weight"] == 99.5
+
+
+@pytest.mark.parametrize(
+    ("phenotype", "genotype", "message"),
+    [
+        (PHENOTYPE_CSV, GENOTYPE_CSV.replace(",004\n", ",005\n", 1), "유전형 정보가 없는"),
+        (PHENOTYPE_CSV, GENOTYPE_CSV.replace("2,0\n", "A/T,0\n", 1), "숫자가 아닌 유전형"),
+        (PHENOTYPE_CSV, GENOTYPE_CSV.replace("1,2,0\n", "1,2,0,5\n", 1), "열 개수"),
+        (PHENOTYPE_CSV, GENOTYPE_CSV.replace("1,2,0\n", "1,2\n", 1), "열 개수"),
+        (PHENOTYPE_CSV.replace("TRUE\n", "TRUE,x\n"), GENOTYPE_CSV, "열 개수"),
+        (PHENOTYPE_CSV, GENOTYPE_CSV.splitlines(keepends=True)[0], "SNP 행이 없습니다"),
+        (PHENOTYPE_CSV, "", "비어 있습니다"),
+        (PHENOTYPE_CSV.replace("002,", "001,"), GENOTYPE_CSV, "중복된 계통 ID"),
+    ],
+)
+def test_invalid_uploads_are_rejected(dataset_root, phenotype, genotype, message):
+    with pytest.raises(ValueError, match=message):
+        _ingest(phenotype=phenotype, genotype=genotype)
+
+    assert list(dataset_root.iterdir()) == []
+
+
+def test_existing_or_invalid_dataset_id_is_rejected(dataset_root):
+    _ingest()
+
+    with pytest.raises(ValueError, match="이미 존재하는"):
+        _ingest()
+    with pytest.raises(ValueError, match="데이터세트 ID"):
+        _ingest(dataset_id="../TC2")
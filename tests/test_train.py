@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import io
+import json
+
+import numpy as np
+import pytest
+
+from app import ingest, model, train
+
+STRAINS = [f"{index:03d}" for index in range(1, 11)]
+
+
+def _phenotype_csv(weight_offset: float = 0.0) -> str:
+    rows = ["Genotype,weight,brix,shape"]
+    for index, strain in enumerate(STRAINS):
+        rows.append(f"{strain},{10 + index * 2 + weight_offset},{4 + index * 0.1:.1f},둥글다")
+    return "\n".join(rows) + "\n"
+
+
+def _genotype_csv() -> str:
+    rng = np.random.default_rng(0)
+    rows = ["snp,chr,bp," + ",".join(STRAINS)]
+    for snp in range(30):
+        calls = ",".join(str(value) for value in rng.integers(0, 3, len(STRAINS)))
+        rows.append(f"s{snp},1,{1000 + snp},{calls}")
+    return "\n".join(rows) + "\n"
+
+
+@pytest.fixture
+def dataset(dataset_root, model_root):
+    ingest.ingest_dataset(
+        "TC2",
+        io.BytesIO(_phenotype_csv().encode("utf-8")),
+        io.BytesIO(_genotype_csv().encode("utf-8")),
+    )
+    return dataset_root / "TC2"
+
+
+def _train(**kwargs):
+    return train.train_model("TC2", n_pc=3, n_estimators=5, max_workers=2, **kwargs)
+
+
+def test_train_publishes_usable_model(dataset):
+    summary = _train()
+
+    assert summary["id"] == "TC2_rf_v1"
+    assert model.list_models() == ["TC2_rf_v1"]
+    info = model.get_model("TC2_rf_v1")
+    assert info["traits"] == ["weight", "brix"]
+    assert info["lineIds"] == STRAINS
+    assert summary["targets"] == {"weight": "midParent", "brix": "midParent"}
+    assert set(summary["timings"]) == {"load", "pca", "features", "train", "traits"}
+
+    prediction = model.predict("TC2_rf_v1", "001", "002")
+    assert set(prediction) == {"weight", "brix"}
+
+
+def test_incremental_retrain_reuses_unchanged_traits(dataset):
+    _train()
+    phenotype_csv = dataset / "phenotype" / "phenotype.csv"
+    phenotype_csv.write_text(_phenotype_csv(weight_offset=5.0), encoding="utf-8")
+
+    summary = _train()
+
+    assert summary["id"] == "TC2_rf_v2"
+    assert summary["retrainedTraits"] == ["weight"]
+    assert summary["reusedTraits"] == ["brix"]
+    assert model.list_models() == ["TC2_rf_v1", "TC2_rf_v2"]
+    assert set(model.predict("TC2_rf_v2", "003", "004")) == {"weight", "brix"}
+
+    assert _train(incremental=False)["retrainedTraits"] == ["weight", "brix"]
+
+
+def test_observed_crosses_are_used_as_targets(dataset):
+    _train()
+    crosses_csv = dataset / "crosses" / "crosses.csv"
+    crosses_csv.parent.mkdir()
+    crosses_csv.write_text(
+        "maleStrainId,femaleStrainId,weight\n001,002,30\n003,004,31\n005,006,\n",
+        encoding="utf-8",
+    )
+
+    summary = _train()
+
+    assert summary["targets"] == {"weight": "observed", "brix": "midParent"}
+    assert summary["retrainedTraits"] == ["weight"]
+    meta = json.loads((model.MODEL_ROOT / "TC2_rf_v2" / "model_meta.json").read_text())
+    assert meta["targets"]["weight"] == "observed"
+
+
+def test_dataset_without_numeric_traits_is_rejected(dataset, model_root):
+    phenotype_csv = dataset / "phenotype" / "phenotype.csv"
+    rows = ["Genotype,shape"] + [f"{strain},둥글다" for strain in STRAINS]
+    phenotype_csv.write_text("\n".join(rows) + "\n", encoding="utf-8")
+
+    with pytest.raises(ValueError, match="수치형 형질"):
+        _train()
+    assert list(model_root.iterdir()) == []
+
+
+def test_dataset_without_genotype_is_rejected(dataset_root, model_root):
+    phenotype_dir = dataset_root / "TC1" / "phenotype"
+    phenotype_dir.mkdir(parents=True)
+    (phenotype_dir / "phenotype.csv").write_text(_phenotype_csv(), encoding="utf-8")
+
+    with pytest.raises(ValueError, match="유전형 데이터"):
+        train.train_model("TC1")